@@ -1,5 +1,5 @@
-from classes.database import Database
-from datetime import datetime, timedelta
+from classes.database import get_db
+from datetime import date
 
 
 class Analysis:
@@ -14,29 +14,44 @@ class Analysis:
         Initialize the Analysis instance.
 
         Attributes:
-        - db (Database): An instance of the Database class for managing database operations.
+        - db (Database): The shared Database instance for managing database operations.
+        - _habits_cache (dict): Habit names per periodicity filter, valid for one database and habits version.
+        - _habits_cache_key (tuple): The database and its habits version the cache was built for.
         """
-        self.db = Database()
+        self.db = get_db()
+        self._habits_cache = {}
+        self._habits_cache_key = None
 
     def list_of_habits(self, period):
         """
         Retrieve all tracked habits filtered by their periodicity.
 
+        Results are cached until the habits table is modified through the database
+        or another database is assigned to db.
+
         Args:
         - period (str): The periodicity filter ('daily', 'weekly', or 'all').
 
         Returns:
-        - list: A list of habit names matching the specified periodicity.
+        - tuple: The names of the habits matching the specified periodicity.
         """
-        if period == "all":
-            query = "SELECT DISTINCT name FROM habits"
-            data = self.db.retrieve_data(query)
-        else:
-            query = "SELECT DISTINCT name FROM habits WHERE periodicity = ?"
-            data = self.db.retrieve_data(query, (period,))
+        # Drop cached results once habits have been written, updated or deleted,
+        # or when the analysis has been pointed at a different database
+        cache_key = (self.db, self.db.habits_version)
+        if self._habits_cache_key != cache_key:
+            self._habits_cache = {}
+            self._habits_cache_key = cache_key
+
+        if period not in self._habits_cache:
+            # Separate queries so the periodicity filter can use idx_habits_periodicity
+            if period == "all":
+                rows = self.db.retrieve_data("SELECT name FROM habits", flat=True)
+            else:
+                query = "SELECT name FROM habits WHERE periodicity = ?"
+                rows = self.db.retrieve_data(query, (period,), flat=True)
+            self._habits_cache[period] = tuple(rows)
 
-        result = [row[0] for row in data]
-        return result
+        return self._habits_cache[period]
 
     def calculate_streak(self, name=None):
         """
@@ -50,73 +65,79 @@ class Analysis:
         - dict: A dictionary of habit names, each containing the current and longest streaks.
         Example: { "habit_name": { "current_streak": 5, "longest_streak": 10 } }
         """
-        # Fetch all habits if no specific name is provided
-        if not name:
-            query = "SELECT DISTINCT name FROM habits"
-            names = [row[0] for row in self.db.retrieve_data(query)]
+        # Compute the streaks inside SQLite: consecutive completions exactly one
+        # period apart (1 day for daily, 7 days for weekly) form an island, the
+        # longest island is the longest streak and the latest island is the
+        # current streak unless its last completion is more than a period ago.
+        # All completions are ordered once; island lengths are the distance
+        # between the positions of consecutive island starts.
+        # Completion dates are converted to Gregorian ordinals (as date.toordinal)
+        # so all date arithmetic is plain integer subtraction.
+        # Filter on the name only when one is given, so the lookup can seek on
+        # idx_completions_name_completed instead of scanning every completion
+        if name:
+            completions_filter = "WHERE c.name = :name"
+            habits_filter = "WHERE h.name = :name"
         else:
-            names = [name]
-
-        # Initialize streaks dictionary
-        streaks = {}
-
-        for habit_name in names:
-            # Fetch completion dates and periodicity for the habit
-            query = """
-            SELECT completed, periodicity FROM completions c
-            LEFT JOIN habits h ON c.name = h.name
-            WHERE c.name = ?
-            ORDER BY completed ASC
-            """
-            completions = self.db.retrieve_data(query, (habit_name,))
-
-            # Edge case: Habit not tracked yet
-            if not completions:
-                streaks[habit_name] = {"current_streak": 0, "longest_streak": 0}
-                continue
-
-            # Convert database results to datetime.date objects
-            dates = [
-                datetime.strptime(row[0], "%Y-%m-%d %H:%M:%S").date()
-                for row in completions
-            ]
-            periodicity = completions[0][1]
-
-            # Determine period delta (1 day for daily, 7 days for weekly)
-            period_delta = 1 if periodicity == "daily" else 7
-
-            # Sort the dates (already sorted in the query, but ensure correctness)
-            sorted_dates = sorted(dates)
-
-            # Initialize streak variables
-            longest_streak = 0
-            current_streak = 1  # Start at 1 since a single date is a streak
-
-            # Compute longest streak and ongoing current streak
-            for i in range(1, len(sorted_dates)):
-                if (sorted_dates[i] - sorted_dates[i - 1]).days == period_delta:
-                    current_streak += 1
-                    longest_streak = max(longest_streak, current_streak)
-                else:
-                    longest_streak = max(longest_streak, current_streak)
-                    current_streak = 1
-
-            # Check if the most recent completion continues the streak
-            today = datetime.now().date()
-            if (today - sorted_dates[-1]).days > period_delta:
-                current_streak = 0
-
-            # Handle edge case where the longest streak is from a single completion
-            longest_streak = max(longest_streak, current_streak)
-
-            # Store both streaks in the result
-            streaks[habit_name] = {
+            completions_filter = habits_filter = ""
+        query = f"""
+        WITH days AS (
+            SELECT c.id, c.name, c.completed,
+                   CAST(julianday(c.completed) - 1721424.5 AS INTEGER) AS day,
+                   CASE h.periodicity WHEN 'daily' THEN 1 ELSE 7 END AS period_delta
+            FROM completions c
+            JOIN habits h ON h.name = c.name
+            {completions_filter}
+        ),
+        numbered AS (
+            SELECT name, day, period_delta,
+                   ROW_NUMBER() OVER w AS position,
+                   COUNT(*) OVER w AS total,
+                   LAST_VALUE(day) OVER w AS last_day,
+                   COALESCE(day - LAG(day) OVER w != period_delta, 1) AS new_island
+            FROM days
+            WINDOW w AS (
+                PARTITION BY name ORDER BY completed, id
+                ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING
+            )
+        ),
+        islands AS (
+            SELECT name, period_delta, last_day,
+                   LEAD(position, 1, total + 1) OVER w - position AS length,
+                   LEAD(position) OVER w IS NULL AS is_latest
+            FROM numbered
+            WHERE new_island
+            WINDOW w AS (PARTITION BY name ORDER BY position)
+        )
+        SELECT h.name,
+               COALESCE(MAX(CASE
+                   WHEN i.is_latest AND :today - i.last_day <= i.period_delta
+                   THEN i.length
+               END), 0) AS current_streak,
+               COALESCE(MAX(i.length), 0) AS longest_streak
+        FROM habits h
+        LEFT JOIN islands i ON i.name = h.name
+        {habits_filter}
+        GROUP BY h.name
+        """
+        rows = self.db.retrieve_stream(
+            query, {"name": name, "today": date.today().toordinal()}
+        )
+
+        streaks = {
+            habit_name: {
                 "current_streak": current_streak,
                 "longest_streak": longest_streak,
             }
+            for habit_name, current_streak, longest_streak in rows
+        }
+
+        # Edge case: Requested habit does not exist
+        if name and name not in streaks:
+            streaks[name] = {"current_streak": 0, "longest_streak": 0}
 
         return streaks
-    
+
     def broken_habits(self):
         """
         Identify habits with broken streaks based on periodicity and last completion datetime.
@@ -126,34 +147,11 @@ class Analysis:
         - Weekly habits are not completed within 7 days of the last recorded completion.
         - Habits with no recorded completions are also considered broken.
 
+        The broken flags are recomputed before they are read, see Database.refresh_broken_habits.
+
         Returns:
         - list: A list of habit names with broken streaks and their status.
         """
-        query = "SELECT DISTINCT periodicity, name FROM habits"
-        data = self.db.retrieve_data(query)
-
-        broken_habits = []
-
-        for row in data:
-            periodicity, name = row
-            last_completed = self.db.helper_check_last_completed_habit_date(name)
-
-            if last_completed:
-                # Parse the datetime from the database
-                last_completed_datetime = datetime.strptime(
-                    last_completed, "%Y-%m-%d %H:%M:%S"
-                )
-                now = datetime.now()
-
-                # Determine if the streak is broken based on periodicity
-                if (
-                    periodicity == "daily" and (now - last_completed_datetime).days > 1
-                ) or (
-                    periodicity == "weekly" and (now - last_completed_datetime).days > 7
-                ):
-                    broken_habits.append(name)
-            else:
-                # No completion records, considered broken
-                broken_habits.append(name)
-
-        return broken_habits
+        self.db.refresh_broken_habits()
+        query = "SELECT name FROM habits WHERE broken = 1"
+        return self.db.retrieve_data(query, flat=True)
@@ -1,9 +1,7 @@
-import questionary
 from classes.habit import Habit
-from classes.database import Database
+from classes.database import get_db
 from classes.analysis import Analysis
 import sys
-from datetime import datetime
 
 
 class CLI:
@@ -20,10 +18,10 @@ class CLI:
         Initialize the CLI instance.
 
         Attributes:
-        - db (Database): An instance of the Database class for managing database operations.
+        - db (Database): The shared Database instance for managing database operations.
         - analysis (Analysis): An instance of the Analysis class for analyzing habits.
         """
-        self.db = Database()
+        self.db = get_db()
         self.analysis = Analysis()
 
     def run(self):
@@ -39,6 +37,8 @@ class CLI:
         Returns:
         - None
         """
+        import questionary
+
         while True:
             choice = questionary.select(
                 "What do you want to do?",
@@ -79,8 +79,12 @@ class CLI:
         Returns:
         - None
         """
+        import questionary
+
         while True:
-            name = questionary.text("Enter a habit name:").ask()
+            name = self.helper_ask_habit_name("Enter a habit name:")
+            if name is None:
+                return  # Prompt cancelled, back to the menu
             if self.db.helper_check_habit_exists(name):
                 print(
                     f"A habit with the name '{name}' already exists. Please choose a different name."
@@ -111,10 +115,14 @@ class CLI:
         Returns:
         - None
         """
+        from datetime import datetime
+
         while True:
-            name = questionary.text(
+            name = self.helper_ask_habit_name(
                 "Please enter a habit activity you want to track for today:"
-            ).ask()
+            )
+            if name is None:
+                return  # Prompt cancelled, back to the menu
             if not self.db.helper_check_habit_exists(name):
                 print(f"The habit '{name}' does not exist. Choose a different one.")
             else:
@@ -138,9 +146,11 @@ class CLI:
         - None
         """
         while True:
-            name = questionary.text(
+            name = self.helper_ask_habit_name(
                 "Please enter a habit activity you want to edit:"
-            ).ask()
+            )
+            if name is None:
+                return  # Prompt cancelled, back to the menu
             if not self.db.helper_check_habit_exists(name):
                 print(f"The habit '{name}' does not exist. Choose a different one.")
             else:
@@ -172,9 +182,11 @@ class CLI:
         - None
         """
         while True:
-            name = questionary.text(
+            name = self.helper_ask_habit_name(
                 "Please enter a habit activity you want to delete:"
-            ).ask()
+            )
+            if name is None:
+                return  # Prompt cancelled, back to the menu
             if not self.db.helper_check_habit_exists(name):
                 print(f"The habit '{name}' does not exist. Choose a different one.")
             else:
@@ -195,6 +207,8 @@ class CLI:
         Returns:
         - None
         """
+        import questionary
+
         analysis_choice = questionary.select(
             "What do you want to analyze?",
             choices=["Habits overview", "Running streaks", "Broken habits"],
@@ -215,11 +229,13 @@ class CLI:
                 choices=["all", "specific"],
             ).ask()
             if choice == "specific":
-                name = questionary.text("Give habit name:").ask()
-                if not self.db.helper_check_habit_exists(name.strip().lower()):
+                name = self.helper_ask_habit_name("Give habit name:")
+                if name is None:
+                    return  # Prompt cancelled, back to the menu
+                if not self.db.helper_check_habit_exists(name):
                     print(f"The habit '{name}' does not exist in the database.")
                     return
-                streak = self.analysis.calculate_streak(name=name.strip().lower())
+                streak = self.analysis.calculate_streak(name=name)
                 print(f"Running streak for '{name}': {streak.get(name, 0)}.")
             else:
                 streaks = self.analysis.calculate_streak()
@@ -236,6 +252,25 @@ class CLI:
             else:
                 print("No habits with broken streaks found.")
 
+    def helper_ask_habit_name(self, message):
+        """
+        Prompt the user for a habit name and normalise it.
+
+        Habit names are compared in lower case with surrounding whitespace removed.
+
+        Args:
+        - message (str): The question shown to the user.
+
+        Returns:
+        - str or None: The normalised habit name, or None if the user cancelled the prompt.
+        """
+        import questionary
+
+        name = questionary.text(message).ask()
+        if name is None:
+            return None
+        return name.strip().lower()
+
     def helper_try_except_habit_exists(self, name):
         """
         Check if a habit exists in the database and handle exceptions.
@@ -261,6 +296,8 @@ class CLI:
         Returns:
         - tuple: A tuple containing periodicity (str) and goal (int).
         """
+        import questionary
+
         while True:
             periodicity = questionary.select(
                 "Choose a periodicity:", choices=["daily", "weekly"]
@@ -291,6 +328,8 @@ class CLI:
         Returns:
         - int: The number of months for analysis.
         """
+        import questionary
+
         while True:
             months = questionary.text(
                 "For how many months do you want to see the analysis (numeric value):"
@@ -1,5 +1,6 @@
 import sqlite3
-from functools import wraps
+from datetime import datetime
+from functools import lru_cache
 
 
 class Database:
@@ -10,6 +11,45 @@ class Database:
     delete, and query data, as well as helper functions for common operations.
     """
 
+    SQL_CREATE_HABITS = """
+        CREATE TABLE IF NOT EXISTS habits (
+            name TEXT PRIMARY KEY,
+            description TEXT,
+            periodicity TEXT,
+            created DATETIME DEFAULT CURRENT_TIMESTAMP,
+            goal INT,
+            broken BOOL
+        )"""
+    SQL_CREATE_COMPLETIONS = """
+        CREATE TABLE IF NOT EXISTS completions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT,
+            completed DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (name) REFERENCES habits (name)
+        )"""
+    SQL_CREATE_COMPLETIONS_INDEX = (
+        "CREATE INDEX IF NOT EXISTS idx_completions_name_completed ON completions(name, completed)"
+    )
+    SQL_CREATE_PERIODICITY_INDEX = (
+        "CREATE INDEX IF NOT EXISTS idx_habits_periodicity ON habits(periodicity)"
+    )
+    SQL_REFRESH_BROKEN = """
+        UPDATE habits SET broken = (
+            SELECT MAX(c.completed) IS NULL
+                OR (habits.periodicity = 'daily'
+                    AND CAST(julianday(:now) - julianday(MAX(c.completed)) AS INTEGER) > 1)
+                OR (habits.periodicity = 'weekly'
+                    AND CAST(julianday(:now) - julianday(MAX(c.completed)) AS INTEGER) > 7)
+            FROM completions c
+            WHERE c.name = habits.name
+        )"""
+    SQL_INSERT_HABIT = "INSERT INTO habits (name, description, periodicity, goal, broken) VALUES (?, ?, ?, ?, ?)"
+    SQL_INSERT_COMPLETION = "INSERT INTO completions (name) VALUES (?)"
+    SQL_UPDATE_HABIT = "UPDATE habits SET periodicity = ?, goal = ? WHERE name = ?"
+    SQL_DELETE_HABIT = "DELETE FROM habits WHERE name = ?"
+    SQL_HABIT_NAMES = "SELECT name FROM habits"
+    SQL_LAST_COMPLETED = "SELECT MAX(completed) FROM completions WHERE name = ?"
+
     def __init__(self, db_name="habits.db"):
         """
         Initialize the Database instance.
@@ -19,37 +59,40 @@ class Database:
 
         Attributes:
         - db_name (str): The name of the database file.
+        - _conn (sqlite3.Connection): The connection shared by all database operations.
+        - habits_version (int): Counter bumped whenever the habits table is modified.
+        - _names (set): The names of all habits, kept in sync by the writers.
         """
         self.db_name = db_name
+        self.habits_version = 0
+        self._conn = sqlite3.connect(
+            self.db_name, check_same_thread=False, cached_statements=256
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA temp_store=MEMORY")
         self.create_table()  # Ensure this is called
+        self._names = {row[0] for row in self._conn.execute(self.SQL_HABIT_NAMES)}
 
-    def db_connection(func):
+    def close(self):
         """
-        Decorator to manage the database connection.
-
-        Ensures the database connection is opened and closed properly
-        around each database operation.
+        Close the database connection.
 
         Args:
-        - func (function): The database operation to wrap.
+        - None
 
         Returns:
-        - function: A wrapped function with managed database connection.
+        - None
         """
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
 
-        @wraps(func)
-        def wrapper(self, *args, **kwargs):
-            connection = sqlite3.connect(self.db_name)
-            try:
-                self.db = connection
-                result = func(self, *args, **kwargs)
-            finally:
-                connection.close()
-            return result
+    def __del__(self):
+        """Close the database connection when the instance is garbage collected."""
+        if getattr(self, "_conn", None) is not None:
+            self.close()
 
-        return wrapper
-
-    @db_connection
     def create_table(self):
         """
         Create the necessary database tables.
@@ -58,35 +101,41 @@ class Database:
         - habits: Stores habit information.
         - completions: Logs the completion dates of habits.
 
+        Also creates the indexes used by the analysis queries:
+        - idx_completions_name_completed: Completions of a habit ordered by date.
+        - idx_habits_periodicity: Habits filtered by periodicity.
+
         Args:
         - None
 
         Returns:
         - None
         """
-        self.db.execute(
-            """
-        CREATE TABLE IF NOT EXISTS habits (
-            name TEXT PRIMARY KEY,
-            description TEXT,
-            periodicity TEXT,
-            created DATETIME DEFAULT CURRENT_TIMESTAMP,
-            goal INT,
-            broken BOOL
-        )"""
-        )
-        self.db.execute(
-            """
-        CREATE TABLE IF NOT EXISTS completions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT,
-            completed DATETIME DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (name) REFERENCES habits (name)
-        )"""
-        )
-        self.db.commit()
+        self._conn.execute(self.SQL_CREATE_HABITS)
+        self._conn.execute(self.SQL_CREATE_COMPLETIONS)
+        self._conn.execute(self.SQL_CREATE_COMPLETIONS_INDEX)
+        self._conn.execute(self.SQL_CREATE_PERIODICITY_INDEX)
+        self._conn.commit()
+
+    def refresh_broken_habits(self):
+        """
+        Recompute the broken flag of every habit.
+
+        A habit is marked broken if it has no completions, or if its last completion
+        is more than 1 day (daily habits) or 7 days (weekly habits) ago. Called
+        by Analysis.broken_habits right before the flags are read, since new
+        habits, completions, periodicity changes and elapsed time all affect them.
+
+        Args:
+        - None
+
+        Returns:
+        - None
+        """
+        now = datetime.now().isoformat(sep=" ", timespec="seconds")
+        self._conn.execute(self.SQL_REFRESH_BROKEN, {"now": now})
+        self._conn.commit()
 
-    @db_connection
     def write_to_db(self, name, description, periodicity, goal, broken):
         """
         Insert a new habit into the database.
@@ -105,13 +154,34 @@ class Database:
         Returns:
         - None
         """
-        self.db.execute(
-            "INSERT INTO habits (name, description, periodicity, goal, broken) VALUES (?, ?, ?, ?, ?)",
-            (name, description, periodicity, goal, broken),
+        self._conn.execute(
+            self.SQL_INSERT_HABIT, (name, description, periodicity, goal, broken)
         )
-        self.db.commit()
+        self._conn.commit()
+        self.habits_version += 1
+        self._names.add(name)
+
+    def write_many(self, rows):
+        """
+        Insert several new habits into the database in a single transaction.
+
+        Args:
+        - rows (iterable): Tuples of (name, description, periodicity, goal, broken),
+        one per habit, in the same order as the arguments of write_to_db.
+
+        Note:
+        - The batch is committed as a whole; if any insert fails, none of the
+        habits are written.
+
+        Returns:
+        - None
+        """
+        rows = list(rows)
+        with self._conn:
+            self._conn.executemany(self.SQL_INSERT_HABIT, rows)
+        self.habits_version += 1
+        self._names.update(row[0] for row in rows)
 
-    @db_connection
     def add_completion(self, name):
         """
         Log the completion of a habit.
@@ -124,10 +194,24 @@ class Database:
         Returns:
         - None
         """
-        self.db.execute("INSERT INTO completions (name) VALUES (?)", (name,))
-        self.db.commit()
+        self._conn.execute(self.SQL_INSERT_COMPLETION, (name,))
+        self._conn.commit()
+
+    def add_completions(self, names):
+        """
+        Log the completion of several habits in a single transaction.
+
+        Adds one record per name in the completions table with the current date.
+
+        Args:
+        - names (list): The names of the habits being completed.
+
+        Returns:
+        - None
+        """
+        self._conn.executemany(self.SQL_INSERT_COMPLETION, [(name,) for name in names])
+        self._conn.commit()
 
-    @db_connection
     def update_entry_in_db(self, name, periodicity, goal):
         """
         Update a habit's periodicity and goal in the database.
@@ -140,13 +224,10 @@ class Database:
         Returns:
         - None
         """
-        self.db.execute(
-            "UPDATE habits SET periodicity = ?, goal = ? WHERE name = ?",
-            (periodicity, goal, name),
-        )
-        self.db.commit()
+        self._conn.execute(self.SQL_UPDATE_HABIT, (periodicity, goal, name))
+        self._conn.commit()
+        self.habits_version += 1
 
-    @db_connection
     def delete_from_db(self, name):
         """
         Delete a habit from the database.
@@ -160,11 +241,12 @@ class Database:
         Returns:
         - None
         """
-        self.db.execute("DELETE FROM habits WHERE name = ?", (name,))
-        self.db.commit()
+        self._conn.execute(self.SQL_DELETE_HABIT, (name,))
+        self._conn.commit()
+        self.habits_version += 1
+        self._names.discard(name)
 
-    @db_connection
-    def retrieve_data(self, query, params=()):
+    def retrieve_data(self, query, params=(), flat=False):
         """
         Retrieve data from the database.
 
@@ -173,29 +255,46 @@ class Database:
         Args:
         - query (str): The SQL query to execute.
         - params (tuple): The parameters for the query.
+        - flat (bool): If True, return only the first column of each row.
 
         Returns:
-        - list: The rows returned by the query.
+        - list: The rows returned by the query, or the first column values if flat is True.
         """
-        cursor = self.db.execute(query, params)
+        cursor = self._conn.execute(query, params)
+        if flat:
+            return [row[0] for row in cursor]
         return cursor.fetchall()
 
-    @db_connection
+    def retrieve_stream(self, query, params=()):
+        """
+        Retrieve data from the database row by row.
+
+        Executes a SELECT query and yields the results straight from the cursor
+        without building a list of all rows.
+
+        Args:
+        - query (str): The SQL query to execute.
+        - params (tuple): The parameters for the query.
+
+        Yields:
+        - tuple: The next row returned by the query.
+        """
+        yield from self._conn.execute(query, params)
+
     def helper_check_habit_exists(self, name):
         """
         Check if a habit exists in the database.
 
+        Looks the name up in the in-memory set of habit names instead of querying SQLite.
+
         Args:
         - name (str): The name of the habit to check.
 
         Returns:
         - bool: True if the habit exists, False otherwise.
         """
-        cursor = self.db.cursor()
-        cursor.execute("SELECT 1 FROM habits WHERE name = ?", (name,))
-        return cursor.fetchone() is not None
+        return name in self._names
 
-    @db_connection
     def helper_check_last_completed_habit_date(self, name):
         """
         Get the last completion date for a habit.
@@ -209,8 +308,23 @@ class Database:
         - str or None: The most recent completion date as a string in 'YYYY-MM-DD'
                        format, or None if the habit has no completions.
         """
-        cursor = self.db.execute(
-            "SELECT MAX(completed) FROM completions WHERE name = ?", (name,)
-        )
+        cursor = self._conn.execute(self.SQL_LAST_COMPLETED, (name,))
         data = cursor.fetchone()
         return data[0] if data and data[0] else None
+
+
+@lru_cache(maxsize=None)
+def get_db(db_name="habits.db"):
+    """
+    Get the shared Database instance for a database file.
+
+    The instance is created on first use and reused afterwards, so the
+    connection and schema setup happen once per process.
+
+    Args:
+    - db_name (str): The name of the SQLite database file. Defaults to 'habits.db'.
+
+    Returns:
+    - Database: The shared Database instance for db_name.
+    """
+    return Database(db_name)
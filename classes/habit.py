@@ -1,4 +1,4 @@
-from classes.database import Database
+from classes.database import get_db
 from datetime import datetime
 
 
@@ -41,14 +41,14 @@ class Habit:
         - The created field is automatically populated with the current timestamp
         by the database, as it is defined with `DATETIME DEFAULT CURRENT_TIMESTAMP`.
 
-        Initializes a database connection for habit management.
+        Uses the shared Database instance for habit management.
         """
         self.name = name
         self.description = description
         self.periodicity = periodicity
         self.goal = goal
         self.broken = broken
-        self.db = Database()
+        self.db = get_db()
 
     def create_habit(self):
         """
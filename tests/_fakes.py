@@ -0,0 +1,58 @@
+from dataclasses import dataclass, field
+
+
+@dataclass
+class FakeCursor:
+    """Lightweight stand-in for a sqlite3 cursor that records executed statements."""
+
+    calls: list = field(default_factory=list)
+    rows: list = field(default_factory=list)
+
+    def execute(self, sql, params=None):
+        """Record the statement and its parameters and return the canned rows."""
+        self.calls.append((sql, params))
+        return iter(self.rows)
+
+    def executemany(self, sql, seq_of_params):
+        """Record the statement together with the full batch of parameters."""
+        self.calls.append((sql, list(seq_of_params)))
+        return iter(self.rows)
+
+
+@dataclass
+class FakeConnection:
+    """Lightweight stand-in for a sqlite3 connection that counts commits."""
+
+    cursor: FakeCursor = field(default_factory=FakeCursor)
+    commit_count: int = 0
+
+    def execute(self, sql, params=None):
+        """Execute the statement on the fake cursor."""
+        return self.cursor.execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        """Execute the batch on the fake cursor."""
+        return self.cursor.executemany(sql, seq_of_params)
+
+    def commit(self):
+        """Count the commit."""
+        self.commit_count += 1
+
+    def __enter__(self):
+        """Start a transaction block like a sqlite3 connection."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Commit the transaction block unless it raised."""
+        if exc_type is None:
+            self.commit()
+        return False
+
+    def close(self):
+        """Nothing to release for the fake connection."""
+
+    def reset(self):
+        """Forget all recorded statements, canned rows and commits."""
+        self.cursor.calls.clear()
+        self.cursor.rows.clear()
+        self.commit_count = 0
@@ -0,0 +1,44 @@
+import pytest
+from unittest.mock import Mock
+from classes.database import Database
+from tests._fakes import FakeConnection
+
+
+@pytest.fixture(scope="session")
+def _database_spec():
+    """Attribute names of the Database class, collected once for all mocked databases."""
+    return dir(Database)
+
+
+@pytest.fixture
+def mock_db(_database_spec):
+    """Fixture providing a fresh mocked database restricted to the Database interface."""
+    return Mock(spec=_database_spec)
+
+
+@pytest.fixture(scope="session")
+def fake_connection():
+    """Fixture providing the fake connection shared by the whole session."""
+    return FakeConnection()
+
+
+@pytest.fixture
+def fake_cursor(fake_connection):
+    """Fixture providing the cursor of the fake connection."""
+    return fake_connection.cursor
+
+
+@pytest.fixture(scope="session")
+def _session_db(fake_connection):
+    """Create a single Database instance on top of the fake connection."""
+    # Patch `sqlite3.connect` only while the Database opens its connection
+    with pytest.MonkeyPatch.context() as patcher:
+        patcher.setattr("sqlite3.connect", lambda *args, **kwargs: fake_connection)
+        return Database(db_name=":memory:")
+
+
+@pytest.fixture
+def db(_session_db, fake_connection):
+    """Fixture providing the shared Database with the recorded statements cleared."""
+    fake_connection.reset()
+    return _session_db
@@ -1,38 +1,87 @@
+import shutil
 import pytest
+from datetime import date, timedelta
 from classes.analysis import Analysis
 from classes.database import Database
 
 
+@pytest.fixture
+def habits_db(tmp_path):
+    """Fixture providing a Database on a private copy of the test_habits.db test database."""
+    db_path = tmp_path / "test_habits.db"
+    shutil.copyfile("test_habits.db", db_path)
+    return Database(db_name=str(db_path))
+
+
+@pytest.fixture
+def analysis(habits_db, monkeypatch):
+    """Fixture to initialize an Analysis instance that uses the test database."""
+    monkeypatch.setattr("classes.analysis.get_db", lambda: habits_db)
+    return Analysis()
+
+
+# Periodicity and completion days (counted back from today) per habit,
+# with the current and longest streak each one should produce
+STREAK_CASES = {
+    "coding": ("daily", (10, 9, 8, 5, 4, 1, 0), 2, 3),  # gaps break the daily runs
+    "jogging": ("daily", (6, 5, 4, 3), 0, 4),  # last run ended more than a day ago
+    "cooking": ("daily", (2, 2, 1), 2, 2),  # second completion on the same day restarts the run
+    "reading": ("weekly", (21, 14, 7), 3, 3),
+    "swimming": ("weekly", (35, 28, 21, 9, 2), 2, 3),  # a 12-day gap breaks the weekly run
+    "biking": ("weekly", (), 0, 0),  # never completed
+    # A single stale completion still counts as a streak of one; the original
+    # Python loop reported 0 here because it only counted runs it had extended
+    "walking": ("daily", (5,), 0, 1),
+}
+
+
+def _add_completions(db, name, days_ago):
+    """Log completions of a habit at noon on the given days before today."""
+    today = date.today()
+    db._conn.executemany(
+        "INSERT INTO completions (name, completed) VALUES (?, ?)",
+        [(name, f"{today - timedelta(days=days)} 12:00:00") for days in days_ago],
+    )
+    db._conn.commit()
+
+
+@pytest.fixture
+def memory_analysis(monkeypatch):
+    """Fixture providing an Analysis on an empty in-memory database."""
+    db = Database(db_name=":memory:")
+    monkeypatch.setattr("classes.analysis.get_db", lambda: db)
+    return Analysis()
+
+
+@pytest.fixture
+def streaks_analysis(memory_analysis):
+    """Fixture providing an Analysis on an in-memory database with completions on known days."""
+    for name, (periodicity, days_ago, _, _) in STREAK_CASES.items():
+        memory_analysis.db.write_to_db(name, "", periodicity, 1, False)
+        _add_completions(memory_analysis.db, name, days_ago)
+    return memory_analysis
+
+
 class TestAnalysis:
-    """Test suite for the Analysis class using pytest and testing the code functionality based on the provided test_habit.db test database."""
-
-    @pytest.fixture(autouse=True)
-    def setup_and_teardown(self):
-        """Fixture to initialize an Analysis instance and use the test database."""
-        # Use the existing `test_habits.db` database
-        self.db = Database(db_name="test_habits.db")
-        self.analysis = Analysis()
-        self.analysis.db = self.db
-        yield
-        # No cleanup required since the database should not be modified
-
-    def test_list_of_habits(self):
+    """Test suite for the Analysis class using pytest, on copies of the provided test_habits.db test database and on in-memory databases with known data."""
+
+    def test_list_of_habits(self, analysis):
         """Test retrieving a list of habits filtered by periodicity."""
         # Test daily habits
-        daily_habits = self.analysis.list_of_habits("daily")
+        daily_habits = analysis.list_of_habits("daily")
         assert len(daily_habits) == 3  # coding, cooking, jogging
         assert "coding" in daily_habits
         assert "cooking" in daily_habits
         assert "jogging" in daily_habits
 
         # Test weekly habits
-        weekly_habits = self.analysis.list_of_habits("weekly")
+        weekly_habits = analysis.list_of_habits("weekly")
         assert len(weekly_habits) == 2  # reading, biking
         assert "reading" in weekly_habits
         assert "biking" in weekly_habits
 
         # Test all habits
-        all_habits = self.analysis.list_of_habits("all")
+        all_habits = analysis.list_of_habits("all")
         assert len(all_habits) == 5  # All habits
         assert "coding" in all_habits
         assert "cooking" in all_habits
@@ -40,10 +89,36 @@ class TestAnalysis:
         assert "biking" in all_habits
         assert "jogging" in all_habits
 
-    def test_calculate_streak(self):
+    def test_list_of_habits_after_write(self, analysis):
+        """Test that cached habit lists are rebuilt once the habits table changes."""
+        assert "rowing" not in analysis.list_of_habits("daily")
+
+        analysis.db.write_to_db("rowing", "Row every morning", "daily", 7, False)
+        assert "rowing" in analysis.list_of_habits("daily")
+        assert "rowing" in analysis.list_of_habits("all")
+
+        analysis.db.update_entry_in_db("rowing", "weekly", 2)
+        assert "rowing" not in analysis.list_of_habits("daily")
+        assert "rowing" in analysis.list_of_habits("weekly")
+
+        analysis.db.delete_from_db("rowing")
+        assert "rowing" not in analysis.list_of_habits("all")
+
+    def test_list_of_habits_after_db_swap(self, memory_analysis):
+        """Test that cached habit lists are not reused for a different database."""
+        memory_analysis.db.write_to_db("rowing", "Row every morning", "daily", 7, False)
+        assert memory_analysis.list_of_habits("all") == ("rowing",)
+
+        # Same habits version, different habits
+        other_db = Database(db_name=":memory:")
+        other_db.write_to_db("reading", "Read a book weekly", "weekly", 2, False)
+        memory_analysis.db = other_db
+        assert memory_analysis.list_of_habits("all") == ("reading",)
+
+    def test_calculate_streak(self, analysis):
         """Test calculating the streaks for habits."""
         # Calculate streaks for coding and cooking
-        streaks = self.analysis.calculate_streak()
+        streaks = analysis.calculate_streak()
 
         # Assertions for coding
         assert "coding" in streaks
@@ -55,10 +130,28 @@ class TestAnalysis:
         assert streaks["cooking"]["current_streak"] == 0  # Shouldn't have a streak
         assert streaks["cooking"]["longest_streak"] >= streaks["cooking"]["current_streak"]
 
-    def test_broken_habits(self):
+    def test_calculate_streak_values(self, streaks_analysis):
+        """Test the current and longest streaks computed from known completion days."""
+        streaks = streaks_analysis.calculate_streak()
+
+        assert streaks == {
+            name: {"current_streak": current, "longest_streak": longest}
+            for name, (_, _, current, longest) in STREAK_CASES.items()
+        }
+
+    def test_calculate_streak_for_name(self, streaks_analysis):
+        """Test calculating the streaks of a single habit, including one that does not exist."""
+        assert streaks_analysis.calculate_streak(name="coding") == {
+            "coding": {"current_streak": 2, "longest_streak": 3}
+        }
+        assert streaks_analysis.calculate_streak(name="rowing") == {
+            "rowing": {"current_streak": 0, "longest_streak": 0}
+        }
+
+    def test_broken_habits(self, analysis):
         """Test identifying habits with broken streaks."""
         # Call the broken_habits method
-        broken = self.analysis.broken_habits()
+        broken = analysis.broken_habits()
 
         # Verify that broken streaks include coding and cooking if applicable
         broken_names = [
@@ -68,3 +161,35 @@ class TestAnalysis:
 
         # Assertions
         assert "coding" in broken_names or "cooking" in broken_names
+
+    def test_broken_habits_follow_writes(self, memory_analysis):
+        """Test that the broken habits reflect habits and completions written in the same session."""
+        db = memory_analysis.db
+
+        # A new habit has no completions yet
+        db.write_to_db("rowing", "Row every morning", "daily", 7, False)
+        assert memory_analysis.broken_habits() == ["rowing"]
+
+        db.add_completion("rowing")
+        assert memory_analysis.broken_habits() == []
+
+        # Three days without a completion break a daily habit but not a weekly one
+        db.write_to_db("reading", "Read a book weekly", "weekly", 2, False)
+        _add_completions(db, "reading", (3,))
+        assert memory_analysis.broken_habits() == []
+
+        db.update_entry_in_db("reading", "daily", 7)
+        assert memory_analysis.broken_habits() == ["reading"]
+
+    def test_refresh_broken_habits(self, memory_analysis):
+        """Test that refreshing recomputes the stored broken flag from the completions."""
+        db = memory_analysis.db
+        query = "SELECT broken FROM habits WHERE name = ?"
+        db.write_to_db("rowing", "Row every morning", "daily", 7, False)
+
+        db.refresh_broken_habits()
+        assert db.retrieve_data(query, ("rowing",), flat=True) == [1]
+
+        db.add_completion("rowing")
+        db.refresh_broken_habits()
+        assert db.retrieve_data(query, ("rowing",), flat=True) == [0]
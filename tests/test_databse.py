@@ -1,104 +1,98 @@
 import pytest
-from unittest.mock import MagicMock, call
+from unittest.mock import ANY
 from classes.database import Database
 
 
-class TestDatabase:
-    """Test suite for the Database class using pytest and a mocked database."""
-
-    @pytest.fixture(autouse=True)
-    def setup_and_teardown(self):
-        """Setup the mock database for each test."""
-        # Mock the database connection and cursor
-        self.mock_connection = MagicMock()
-        self.mock_cursor = MagicMock()
-        self.mock_connection.cursor.return_value = self.mock_cursor
-        self.mock_connection.execute = self.mock_cursor.execute
-        self.mock_connection.commit = MagicMock()
-
-        # Patch the `sqlite3.connect` to return the mocked connection
-        self.patcher = pytest.MonkeyPatch()
-        self.patcher.setattr("sqlite3.connect", lambda _: self.mock_connection)
-
-        # Create a Database instance
-        self.db = Database(db_name=":memory:")
-
-        # Reset mocks before each test
-        self.mock_cursor.reset_mock()
-        self.mock_connection.reset_mock()
-
-        yield
-
-        # Stop patching
-        self.patcher.undo()
-
-    def test_create_table(self):
-        """Test that the required tables are created in the database."""
-        self.db.create_table()
-
-        # Verify that the correct SQL commands were executed
-        expected_calls = [
-            call("""
-        CREATE TABLE IF NOT EXISTS habits (
-            name TEXT PRIMARY KEY,
-            description TEXT,
-            periodicity TEXT,
-            created DATETIME DEFAULT CURRENT_TIMESTAMP,
-            goal INT,
-            broken BOOL
-        )"""),
-            call("""
-        CREATE TABLE IF NOT EXISTS completions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT,
-            completed DATETIME DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (name) REFERENCES habits (name)
-        )"""),
-        ]
-        self.mock_connection.execute.assert_has_calls(expected_calls, any_order=True)
-        assert self.mock_connection.commit.call_count == 1
+EXPECTED_CREATE_CALLS = [
+    (Database.SQL_CREATE_HABITS, None),
+    (Database.SQL_CREATE_COMPLETIONS, None),
+    (Database.SQL_CREATE_COMPLETIONS_INDEX, None),
+    (Database.SQL_CREATE_PERIODICITY_INDEX, None),
+]
+EXPECTED_WRITE_ARGS = ("Exercise", "Daily exercise routine", "daily", 1, False)
+EXPECTED_WRITE_CALL = (Database.SQL_INSERT_HABIT, EXPECTED_WRITE_ARGS)
+EXPECTED_COMPLETION_ARGS = ("Meditation",)
+EXPECTED_COMPLETION_CALL = (Database.SQL_INSERT_COMPLETION, EXPECTED_COMPLETION_ARGS)
+EXPECTED_UPDATE_ARGS = ("Reading", "weekly", 3)
+EXPECTED_UPDATE_CALL = (Database.SQL_UPDATE_HABIT, ("weekly", 3, "Reading"))
+EXPECTED_DELETE_ARGS = ("Coding",)
+EXPECTED_DELETE_CALL = (Database.SQL_DELETE_HABIT, EXPECTED_DELETE_ARGS)
+EXPECTED_COMPLETIONS_ARGS = (["Meditation", "Reading"],)
+EXPECTED_COMPLETIONS_CALL = (
+    Database.SQL_INSERT_COMPLETION,
+    [("Meditation",), ("Reading",)],
+)
+EXPECTED_MANY_ROWS = [
+    ("Exercise", "Daily exercise routine", "daily", 1, False),
+    ("Reading", "Read a book weekly", "weekly", 3, False),
+]
+EXPECTED_MANY_CALL = (Database.SQL_INSERT_HABIT, EXPECTED_MANY_ROWS)
+EXPECTED_REFRESH_CALL = (Database.SQL_REFRESH_BROKEN, {"now": ANY})
 
-    def test_write_to_db(self):
-        """Test that a habit is correctly written to the database."""
-        self.db.write_to_db("Exercise", "Daily exercise routine", "daily", 1, False)
-
-        # Verify that the correct SQL command was executed
-        self.mock_cursor.execute.assert_called_once_with(
-            "INSERT INTO habits (name, description, periodicity, goal, broken) VALUES (?, ?, ?, ?, ?)",
-            ("Exercise", "Daily exercise routine", "daily", 1, False),
-        )
-        assert self.mock_connection.commit.call_count == 1
-
-    def test_add_completion(self):
-        """Test that a completion is added for a habit."""
-        self.db.add_completion("Meditation")
-
-        # Verify that the correct SQL command was executed
-        self.mock_cursor.execute.assert_called_once_with(
-            "INSERT INTO completions (name) VALUES (?)", ("Meditation",)
-        )
-        assert self.mock_connection.commit.call_count == 1
-
-    def test_update_entry_in_db(self):
-        """Test that an entry in the database is updated correctly."""
-        self.db.update_entry_in_db("Reading", "weekly", 3)
-
-        # Verify that the correct SQL command was executed
-        self.mock_cursor.execute.assert_called_once_with(
-            "UPDATE habits SET periodicity = ?, goal = ? WHERE name = ?",
-            ("weekly", 3, "Reading"),
-        )
-        assert self.mock_connection.commit.call_count == 1
-
-    def test_delete_from_db(self):
-        """Test that a habit is deleted from the database."""
-        self.db.delete_from_db("Coding")
-
-        # Verify that the correct SQL command was executed
-        self.mock_cursor.execute.assert_called_once_with(
-            "DELETE FROM habits WHERE name = ?", ("Coding",)
-        )
-        assert self.mock_connection.commit.call_count == 1
-
-   
 
+class TestDatabase:
+    """Test suite for the Database class using pytest and a fake database connection."""
+
+    @pytest.mark.parametrize(
+        "method_name,args,expected_calls",
+        [
+            ("create_table", (), EXPECTED_CREATE_CALLS),
+            ("write_to_db", EXPECTED_WRITE_ARGS, [EXPECTED_WRITE_CALL]),
+            ("write_many", (EXPECTED_MANY_ROWS,), [EXPECTED_MANY_CALL]),
+            ("add_completion", EXPECTED_COMPLETION_ARGS, [EXPECTED_COMPLETION_CALL]),
+            ("update_entry_in_db", EXPECTED_UPDATE_ARGS, [EXPECTED_UPDATE_CALL]),
+            ("delete_from_db", EXPECTED_DELETE_ARGS, [EXPECTED_DELETE_CALL]),
+            ("add_completions", EXPECTED_COMPLETIONS_ARGS, [EXPECTED_COMPLETIONS_CALL]),
+            ("refresh_broken_habits", (), [EXPECTED_REFRESH_CALL]),
+        ],
+        ids=[
+            "create_table",
+            "write_habit",
+            "write_many",
+            "add_completion",
+            "update_entry",
+            "delete_habit",
+            "add_completions",
+            "refresh_broken",
+        ],
+    )
+    def test_write(self, db, fake_cursor, fake_connection, method_name, args, expected_calls):
+        """Test that each write executes its SQL commands and commits once."""
+        getattr(db, method_name)(*args)
+
+        assert fake_cursor.calls == expected_calls
+        assert fake_connection.commit_count == 1
+
+    def test_retrieve_stream(self, db, fake_cursor, fake_connection):
+        """Test that query results are yielded row by row from the cursor."""
+        fake_cursor.rows.extend([("coding",), ("cooking",)])
+
+        rows = db.retrieve_stream(Database.SQL_HABIT_NAMES)
+
+        # Verify that the query only runs once the rows are consumed
+        assert fake_cursor.calls == []
+        assert list(rows) == [("coding",), ("cooking",)]
+        assert fake_cursor.calls == [(Database.SQL_HABIT_NAMES, ())]
+
+    def test_helper_check_habit_exists(self, db, fake_cursor, fake_connection):
+        """Test that habit names are tracked without querying the database."""
+        db.write_to_db(*EXPECTED_WRITE_ARGS)
+        assert db.helper_check_habit_exists("Exercise")
+
+        db.delete_from_db("Exercise")
+        assert not db.helper_check_habit_exists("Exercise")
+
+        # Only the write and the delete reached the database
+        assert len(fake_cursor.calls) == 2
+
+    def test_habits_version(self, db, fake_cursor, fake_connection):
+        """Test that writes to the habits table bump the habits version."""
+        version = db.habits_version
+
+        db.write_to_db(*EXPECTED_WRITE_ARGS)
+        db.update_entry_in_db("Exercise", "weekly", 3)
+        db.add_completion("Exercise")
+        db.delete_from_db("Exercise")
+
+        # Completions do not modify the habits table
+        assert db.habits_version == version + 3
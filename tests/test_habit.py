@@ -1,77 +1,85 @@
+import functools
 import pytest
-from unittest.mock import MagicMock
 from classes.habit import Habit
-from classes.database import Database
+
+
+@functools.lru_cache(maxsize=None)
+def _habit(name, description, periodicity, goal, broken):
+    """Create each distinct Habit once per test session."""
+    # Keep the habit from opening the application's habits.db
+    with pytest.MonkeyPatch.context() as patcher:
+        patcher.setattr("classes.habit.get_db", lambda: None)
+        return Habit(
+            name=name,
+            description=description,
+            periodicity=periodicity,
+            goal=goal,
+            broken=broken,
+        )
+
+
+def _bind_db(habit, mock_db):
+    """Point a cached habit at the mocked database and restore it afterwards."""
+    original = habit.db
+    habit.db = mock_db
+    yield habit
+    habit.db = original
+
+
+@pytest.fixture
+def meditation_habit(mock_db):
+    """Fixture providing the meditation Habit with a mocked database."""
+    habit = _habit("meditation", "Practice mindfulness meditation daily", "daily", 7, False)
+    yield from _bind_db(habit, mock_db)
+
+
+@pytest.fixture
+def coding_habit(mock_db):
+    """Fixture providing the coding Habit with a mocked database."""
+    habit = _habit("coding", "Practice coding daily", "daily", 5, False)
+    yield from _bind_db(habit, mock_db)
+
+
+@pytest.fixture
+def cooking_habit(mock_db):
+    """Fixture providing the cooking Habit with a mocked database."""
+    habit = _habit("cooking", "Cook meals weekly", "weekly", 2, False)
+    yield from _bind_db(habit, mock_db)
 
 
 class TestHabits:
     """Test suite for the Habit class using pytest with a mocked database."""
 
-    @pytest.fixture(autouse=True)
-    def setup_and_teardown(self):
-        """Fixture to initialize a Habit instance with a mocked database."""
-        # Mock the database
-        self.mock_db = MagicMock(spec=Database)
-
-        # Define unique habit names
-        self.habits = {
-            "meditation": Habit(
-                name="meditation",
-                description="Practice mindfulness meditation daily",
-                periodicity="daily",
-                goal=7,
-                broken=False,
-            ),
-            "coding": Habit(
-                name="coding",
-                description="Practice coding daily",
-                periodicity="daily",
-                goal=5,
-                broken=False,
-            ),
-            "cooking": Habit(
-                name="cooking",
-                description="Cook meals weekly",
-                periodicity="weekly",
-                goal=2,
-                broken=False,
-            ),
-        }
-
-        # Replace the database in each habit instance with the mock
-        for habit in self.habits.values():
-            habit.db = self.mock_db
-
-    def test_create_habit(self):
+    def test_create_habit(self, meditation_habit, mock_db):
         """Test creating new habits."""
-        habit = self.habits["meditation"]
+        habit = meditation_habit
 
         # Call the method
         habit.create_habit()
 
         # Verify the database insertion
-        self.mock_db.write_to_db.assert_called_once_with(
+        mock_db.write_to_db.assert_called_once_with(
             habit.name, habit.description, habit.periodicity, habit.goal, habit.broken
         )
 
-    def test_add_completion(self):
+    def test_add_completion(self, coding_habit, mock_db):
         """Test adding a completion for a habit."""
-        habit = self.habits["coding"]
+        habit = coding_habit
 
         # Call the method
         habit.add_completion(habit.name)
 
         # Verify that the completion is logged
-        self.mock_db.add_completion.assert_called_once_with(habit.name)
+        mock_db.add_completion.assert_called_once_with(habit.name)
 
-    def test_update_habit(self):
+    def test_update_habit(self, cooking_habit, mock_db):
         """Test updating a habit's periodicity and goal."""
-        habit = self.habits["cooking"]
+        habit = cooking_habit
 
         # Call the method
         habit.update_habit(new_periodicity="weekly", new_goal=3)
 
         # Verify the database update
-        self.mock_db.update_entry_in_db.assert_called_once_with(
+        mock_db.update_entry_in_db.assert_called_once_with(
             habit.name, "weekly", 3
         )